@@ -18,10 +18,12 @@ Version 1.0
 #   file contains a list of commands to be launched when specific MIDI events
 #   are received; these commands are stored in Command objects (see below).
 #
-#   Within a loop, the MIDI input ports are polled for MIDI messages, and the
-#   commands are launched when the corresponding MIDI events are received. This
-#   is done by passing the MIDI messages to the Command objects which in turn
-#   check if the message matches the criteria specified in the config file.
+#   The MIDI input ports are opened with a callback that puts the received
+#   MIDI messages into a queue. Within a loop, the messages are taken from the
+#   queue, and the commands are launched when the corresponding MIDI events are
+#   received. This is done by passing the MIDI messages to the Command objects
+#   which in turn check if the message matches the criteria specified in the
+#   config file.
 #
 #   Also, within the loop, the list of input ports is renewed every 5 seconds to
 #   handle cases where a new MIDI device is connected or disconnected while the
@@ -42,11 +44,23 @@ Version 1.0
 # TODO: Add a feature to log the MIDI messages to a file.
 
 
-import argparse
+import collections.abc
+import contextlib
+import dataclasses
+import functools
+import hashlib
+import io
+import math
+import os
+import pickle
+import queue
 import re
+import shlex
 import subprocess
 import sys
+import threading
 import time
+import types
 
 
 # Python 3.11 or later is required to run this script.
@@ -56,16 +70,11 @@ if sys.version_info < (3, 11):
     print("Python 3.11 or later is required to run this script.")
     sys.exit(1)
 
-import tomllib
-
-try:
-    import mido
-    from rtmidi import InvalidPortError
-    mido.set_backend('mido.backends.rtmidi', load=True)
-except ImportError:
-    print("Please install the required dependencies by running:")
-    print("pip install python-rtmidi mido[ports-rtmidi]")
-    sys.exit(1)
+# The MIDI modules are imported by import_midi_modules() only when they are
+# needed. This way, options like --help or --config-file-help do not have to
+# wait for the MIDI backend to be loaded.
+mido = None
+InvalidPortError = None
 
 
 MAJOR_VERSION_NUMBER = 1
@@ -77,13 +86,59 @@ VERSION_NUMBER = f"{MAJOR_VERSION_NUMBER}.{MINOR_VERSION_NUMBER}"
 # Helper functions                                                            #
 ###############################################################################
 
+# Processes launched by the commands which may still be running. Terminated
+# processes are removed by reap_processes() so that they do not linger around
+# as zombie processes.
+_processes = collections.deque()
+
+
+def reap_processes():
+    """Remove the terminated processes from the list of launched processes."""
+    for _ in range(len(_processes)):
+        process = _processes.popleft()
+        if process.poll() is None:
+            _processes.append(process)
+
+
+def _code_hash():
+    """Return a hash of the source code of this program (None if it cannot be
+    read). It identifies the code which created a cached Command object."""
+    try:
+        with open(__file__, 'rb') as file:
+            return hashlib.sha256(file.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def import_midi_modules():
+    """Import mido and rtmidi and load the rtmidi backend (once)."""
+    global mido, InvalidPortError
+    if mido is not None:
+        return
+    try:
+        import mido
+        from rtmidi import InvalidPortError
+        mido.set_backend('mido.backends.rtmidi', load=True)
+    except ImportError:
+        print("Please install the required dependencies by running:")
+        print("pip install python-rtmidi mido[ports-rtmidi]")
+        sys.exit(1)
+
+
 def list_input_ports():
     """List the available MIDI input ports."""
+    import_midi_modules()
     print("Available input ports:")
     for i, port in enumerate(mido.get_input_names()):
         print(f"{i}. {port}")
 
 
+# Regular expressions used by parse_user_input(); compiled once instead of on
+# every (recursive) call of the function.
+_ITEM_RE = re.compile(r'[^,\s]+')  # Items separated by commas or whitespace
+_RANGE_RE = re.compile(r'(?P<start>-?\d+)\s*:\s*(?P<end>-?\d+)\s*(:\s*(?P<step>-?\d+))?')  # <start>:<end>:<step>
+
+
 def parse_user_input(user_input:int|str|list,
                      default_range= (0, 127),
                      header_text='',
@@ -138,126 +193,199 @@ def parse_user_input(user_input:int|str|list,
     - [1]:              [1]
     - [1, 2, 3]:        [1, 2, 3]
     - [1, 2, "3-5"]:    [1, 2, 3, 4, 5]
+
+    Since the same inputs (e.g. "all") occur for many commands, the parsing
+    results are cached. Error and warning messages are printed on every call
+    nevertheless.
+    """
+
+    # The input is converted into a hashable key which includes the types of
+    # all (nested) items. Inputs which are not hashable (or too deeply nested)
+    # are parsed without the cache.
+    try:
+        key = _to_hashable(user_input)
+        hash(key)
+    except (TypeError, RecursionError):
+        messages = []
+        result = _parse_user_input(user_input, tuple(default_range), range_separator, messages)
+    else:
+        result, messages = _parse_user_input_cached(key, tuple(default_range), range_separator)
+
+    for is_error, message in messages:
+        print_message = print_error if is_error else print_warning
+        if header_text: print_message(header_text)
+        print_message(message)
+    return list(result)
+
+
+def _to_hashable(user_input):
+    """Convert the input into a (type, value) tuple; (nested) lists and tuples
+    are converted recursively. The types are part of the key since e.g. 60,
+    60.0, and True are equal but are parsed differently."""
+    if isinstance(user_input, list|tuple):
+        return (type(user_input), tuple(_to_hashable(item) for item in user_input))
+    return (type(user_input), user_input)
+
+
+def _from_hashable(key):
+    """Convert a key created by _to_hashable() back into the input."""
+    item_type, value = key
+    if issubclass(item_type, list|tuple):
+        return [_from_hashable(item) for item in value]
+    return value
+
+
+@functools.lru_cache(maxsize=512)
+def _parse_user_input_cached(key, default_range, range_separator) -> tuple:
+    """Cached version of _parse_user_input() returning (result, messages) tuples."""
+    messages = []
+    result = _parse_user_input(_from_hashable(key), default_range, range_separator, messages)
+    return tuple(result), tuple(messages)
+
+
+def _parse_user_input(user_input, default_range, range_separator, messages) -> list:
+    """
+    Implementation of parse_user_input(). Instead of printing the error and
+    warning messages, (is_error, message) tuples are appended to the messages
+    list.
     """
 
     # Check if the user input is of the correct type.
-    if not isinstance(user_input, int|str|list):
-        if header_text: print_error(header_text)
-        print_error(f"Error parsing the input. Expected a number, a string, or a list, but got '{type(user_input)}'. Ignoring the input.\n")
+    if not isinstance(user_input, int|str|list|tuple):
+        messages.append((True, f"Error parsing the input. Expected a number, a string, or a list, but got '{type(user_input)}'. Ignoring the input.\n"))
         return []
 
     # Case: Single number
     if isinstance(user_input, int):
         # Check if the input is in the default range. Print a warning if it is not.
         if user_input < default_range[0] or user_input > default_range[1]:
-            if header_text: print_warning(header_text)
-            print_warning(f"Warning: Input value '{user_input}' is outside the expected range {default_range}.")
+            messages.append((False, f"Warning: Input value '{user_input}' is outside the expected range {default_range}."))
         return [user_input]
 
-    # Case: String
-    if isinstance(user_input, str):
-        # Empty input string: return an empty list.
-        if not user_input:
-            return []
-
-        # Input string is the keyword "all": return a list of all numbers in the
-        # range specified by the default_range parameter.
-        if user_input == 'all':
-            return list(range(default_range[0], default_range[1] + 1))
-
-        # Check if the input string is a comma-separated list of items. If so,
-        # split the string by commas and whitespace and parse the individual
-        # items by recursively calling the parse_user_input function.
-        # Concatenate the resulting lists.
-        resulting_list = []
-        items = re.split(r',\s*|\s+', user_input)
-        if len(items) > 1:
-            for item in items:
-                resulting_list.extend(parse_user_input(item, default_range, header_text, print_error, print_warning, range_separator))
-            return resulting_list
-
-        # Input string is a single number: convert it to an integer.
-        if user_input.isdigit():
-            number = int(user_input)
-            # Check if the number is within the default range.
-            if number < default_range[0] or number > default_range[1]:
-                if header_text: print_warning(header_text)
-                print_warning(f"Warning: Input value '{number}' is outside the expected range {default_range}.")
-            return [number]
-
-        # Range written in the form "<start>:<end>:<step>"
-        # Regular expression to match the range where the step is optional.
-        pattern = re.compile(r'(?P<start>-?\d+)\s*:\s*(?P<end>-?\d+)\s*(:\s*(?P<step>-?\d+))?')
-        match = pattern.match(user_input.lower())
-        if match:
-            start = match.group('start')
-            end = match.group('end')
-            step = match.group('step')
-            if step is None:
-                step = 1
-            # Check if the step value is zero.
-            if step == 0:
-                if header_text: print_error(header_text)
-                print_error("Error: Step value cannot be zero. Ignoring the range.")
-                return []
-            # Check if the start value is greater than the end value.
-            if int(start) > int(end):
-                if header_text: print_error(header_text)
-                print_error("Error: Start value is greater than the end value. Ignoring the range.")
-                return []
-            # Check if the step value is negative and reverse the start and end values.
-            if int(step) < 0:
-                start, end = end, start
-            # Check if the start and end values are within the default range.
-            if int(start) < default_range[0] or int(end) > default_range[1]:
-                if header_text: print_warning(header_text)
-                print_warning(f"Warning: Range '{user_input}' is outside the expected range {default_range}.")
-            # Convert the start, end, and step values to integers and return the range.
-            return list(range(int(start), int(end) + 1, int(step)))
-        
-        # Input string is a range written in the form "start-end" (or any other
-        # separator): convert it to a list of numbers.
-        if range_separator in user_input:
-            try:
-                start, end = user_input.split(range_separator)
-                start = int(start)
-                end = int(end)
-            except ValueError:
-                if header_text: print_error(header_text)
-                print_error(f"Error parsing the range: '{user_input}'. Ignoring the range.")
-                return []
-            # Check if the start value is greater than the end value.
-            if start > end:
-                if header_text: print_error(header_text)
-                print_error("Error: Start value is greater than the end value. Ignoring the range.")
-                return []
-            # Check if the start and end values are within the default range.
-            if start < default_range[0] or end > default_range[1]:
-                if header_text: print_warning(header_text)
-                print_warning(f"Warning: Range '{start}{range_separator}{end}' is outside the expected range {default_range}.")
-            return list(range(start, end + 1))
-
-        # Could not match the input string to any of the supported formats.
-        if header_text: print_error(header_text)
-        print_error(f"Error parsing the input: '{user_input}'. Ignoring the input.")
-        return []
+    # Case: String or (nested) list
+    # The input is processed with an explicit stack instead of recursion.
+    # Strings are split into their items (separated by commas and whitespace)
+    # in a single pass and the items are parsed individually; an empty string
+    # results in an empty list. The items of lists are put on the stack in
+    # their original order; numbers within lists are taken as they are, other
+    # types are ignored.
+    resulting_list = []
+    stack = collections.deque([user_input])
+    while stack:
+        item = stack.popleft()
+        if isinstance(item, str):
+            for match in _ITEM_RE.finditer(item):
+                _parse_item(match.group(), default_range, range_separator, resulting_list, messages)
+        elif isinstance(item, int):
+            # Check if the item is within the default range.
+            if item < default_range[0] or item > default_range[1]:
+                messages.append((False, f"Warning: Input value {item} is outside the expected range {default_range}."))
+            resulting_list.append(item)
+        elif isinstance(item, list|tuple):
+            stack.extendleft(reversed(item))
+    return resulting_list
+
+
+def _parse_item(user_input, default_range, range_separator, resulting_list, messages):
+    """Parse a single item of an input string (see _parse_user_input()) and
+    append the resulting numbers to resulting_list."""
+
+    # Input string is the keyword "all": append all numbers in the range
+    # specified by the default_range parameter.
+    if user_input == 'all':
+        resulting_list.extend(_full_range(default_range))
+        return
+
+    # Input string is a single number: convert it to an integer.
+    if user_input.isdigit():
+        number = int(user_input)
+        # Check if the number is within the default range.
+        if number < default_range[0] or number > default_range[1]:
+            messages.append((False, f"Warning: Input value '{number}' is outside the expected range {default_range}."))
+        resulting_list.append(number)
+        return
+
+    # Range written in the form "<start>:<end>:<step>"
+    # Regular expression to match the range where the step is optional.
+    match = _RANGE_RE.match(user_input)
+    if match:
+        # Convert the start, end, and step values to integers once.
+        start = int(match.group('start'))
+        end = int(match.group('end'))
+        step = int(match.group('step') or 1)
+        # Check if the step value is zero.
+        if step == 0:
+            messages.append((True, "Error: Step value cannot be zero. Ignoring the range."))
+            return
+        # Check if the start value is greater than the end value.
+        if start > end:
+            messages.append((True, "Error: Start value is greater than the end value. Ignoring the range."))
+            return
+        # Check if the step value is negative and reverse the start and end values.
+        if step < 0:
+            start, end = end, start
+        # Check if the start and end values are within the default range.
+        if start < default_range[0] or end > default_range[1]:
+            messages.append((False, f"Warning: Range '{user_input}' is outside the expected range {default_range}."))
+        resulting_list.extend(range(start, end + 1, step))
+        return
+    
+    # Input string is a range written in the form "start-end" (or any other
+    # separator): convert it to a list of numbers.
+    if range_separator in user_input:
+        try:
+            start, end = user_input.split(range_separator)
+            start = int(start)
+            end = int(end)
+        except ValueError:
+            messages.append((True, f"Error parsing the range: '{user_input}'. Ignoring the range."))
+            return
+        # Check if the start value is greater than the end value.
+        if start > end:
+            messages.append((True, "Error: Start value is greater than the end value. Ignoring the range."))
+            return
+        # Check if the start and end values are within the default range.
+        if start < default_range[0] or end > default_range[1]:
+            messages.append((False, f"Warning: Range '{start}{range_separator}{end}' is outside the expected range {default_range}."))
+        resulting_list.extend(range(start, end + 1))
+        return
+
+    # Could not match the input string to any of the supported formats.
+    messages.append((True, f"Error parsing the input: '{user_input}'. Ignoring the input."))
+
 
-    # Case: List
-    # Check if the list contains strings and parse them individually.
-    if isinstance(user_input, list):
-        resulting_list = []
-        for item in user_input:
-            if isinstance(item, int):
-                # Check if the item is within the default range.
-                if item < default_range[0] or item > default_range[1]:
-                    if header_text: print_warning(header_text)
-                    print_warning(f"Warning: Input value {item} is outside the expected range {default_range}.")
-                resulting_list.append(item)
-            elif isinstance(item, str):
-                resulting_list.extend(parse_user_input(item, default_range, header_text, print_error, print_warning, range_separator))
-            elif isinstance(item, list):
-                resulting_list.extend(parse_user_input(item, default_range, header_text, print_error, print_warning, range_separator))
-        return resulting_list
+# The expansions of the default ranges are computed once per range since only
+# a few different default ranges are used (e.g. 1-16 for channels and 0-127
+# for notes and values).
+
+@functools.lru_cache
+def _full_range(default_range: tuple) -> tuple:
+    """Return all numbers in the given range (both ends included)."""
+    return tuple(range(default_range[0], default_range[1] + 1))
+
+
+@functools.lru_cache
+def _full_range_set(default_range: tuple) -> frozenset:
+    """Return the set of all numbers in the given range (both ends included)."""
+    return frozenset(_full_range(default_range))
+
+
+def parse_user_input_set(user_input:int|str|list,
+                         default_range=(0, 127),
+                         **kwargs
+                        ) -> frozenset:
+    """
+    Parse the user input like parse_user_input() but return a frozenset of
+    numbers.
+
+    The keyword "all" is by far the most common input. For it, a cached set of
+    all numbers in the default range is returned which is shared between all
+    callers; no intermediate list is built. All other inputs are passed on to
+    parse_user_input() together with the keyword arguments.
+    """
+    if user_input == 'all':
+        return _full_range_set(tuple(default_range))
+    return frozenset(parse_user_input(user_input, default_range, **kwargs))
 
 
 ###############################################################################
@@ -267,17 +395,23 @@ def parse_user_input(user_input:int|str|list,
 class MIDILauncher:
     """Monitor MIDI messages and launch commands based on the messages received."""
 
-    def __init__(self, config_file='config.toml', verbosity_level=0, ignore_clock=False):
+    def __init__(self, config_file='config.toml', verbosity_level=0, ignore_clock=False, coalesce_cc=False):
         self.verbosity_level = verbosity_level
         self.commands = []
         self.config_file = config_file
         self.ignore_clock = ignore_clock
-        self.open_ports = self.get_input_ports()
+        self.coalesce_cc = coalesce_cc
+        self.queue = queue.SimpleQueue()  # Received messages as (port, message) tuples.
+        self.open_ports = []
+        self._open_names_set = frozenset()  # Names of the open ports; updated by _sync_ports()
+        self._message_types = None  # Message types to queue (None: all); updated by parse_config_file()
+        import_midi_modules()
+        self.get_input_ports()
 
         self.parse_config_file()
 
 
-    def get_input_ports(self) -> list:
+    def get_input_ports(self):
         """Get the available input ports and open them."""
 
         # Check for any available input ports and exit if no ports are available
@@ -286,6 +420,29 @@ class MIDILauncher:
             print("No input ports available.")
             sys.exit(1)
 
+        self._sync_ports(input_ports)
+
+
+    def _on_message(self, port, message):
+        """Put a received message into the message queue.
+
+        This is the callback of the input ports which is called by the MIDI
+        backend from its own thread. Messages of types which no command listens
+        to (e.g. clock messages) are dropped right away.
+        """
+        message_types = self._message_types
+        if message_types is None or message.type in message_types:
+            self.queue.put((port, message))
+
+
+    def _sync_ports(self, input_ports):
+        """Synchronize the open ports with the given list of port names.
+
+        Ports that are no longer available are closed and new ports are opened;
+        ports that are still available are kept open. Opening a port can be
+        expensive depending on the MIDI backend.
+        """
+
         # Print the available input ports
         if self.verbosity_level:
             print("Available input ports:\n")
@@ -293,21 +450,104 @@ class MIDILauncher:
                 print(f"{i}. {port.split(':')[0]}")
             print()
 
-        # Open all input ports
-        return [mido.open_input(port_name) for port_name in input_ports]
+        # Close the ports that have been removed. Their callbacks must not
+        # queue any further messages.
+        names = set(input_ports)
+        for port in self.open_ports:
+            if port.name not in names:
+                port.close()
+        self.open_ports = [port for port in self.open_ports if port.name in names]
+
+        # Open the new input ports. The callback is invoked by the MIDI backend
+        # for every received message and puts the message into the message
+        # queue together with the port that received it. The names of the port
+        # used for printing and for matching the commands are computed only
+        # once.
+        for port_name in input_ports:
+            if port_name in self._open_names_set:
+                continue
+            port = mido.open_input(port_name)
+            port._display_name = port.name.split(':')[0]
+            port._name_lower = port.name.lower()
+            if self.ignore_clock:
+                # Let RtMidi drop the timing messages (clock and MIDI time
+                # code) so that they never reach Python. System exclusive
+                # messages are still received, active sensing messages are
+                # ignored as by default.
+                port._rt.ignore_types(sysex=False, timing=True, active_sense=True)
+            port.callback = functools.partial(self._on_message, port)
+            self.open_ports.append(port)
+        self._open_names_set = frozenset(port.name for port in self.open_ports)
 
 
     def parse_config_file(self):
         """Parse the configuration file."""
         if self.verbosity_level:
             print(f"Reading configuration file: {self.config_file}\n")
+
+        # If the configuration file has not changed since it has been parsed
+        # the last time, the commands are loaded from the cache file instead.
+        # The messages printed while parsing the configuration file (errors
+        # and warnings) are stored in the cache as well and are printed again
+        # whenever the commands are loaded from the cache.
+        cache_key = self._command_cache_key()
+        if not self.load_command_cache(cache_key):
+            output = io.StringIO()
+            try:
+                with contextlib.redirect_stdout(output):
+                    self.read_config_file()
+            finally:
+                print(output.getvalue(), end='')
+            self.save_command_cache(cache_key, output.getvalue())
+
+        # Group the commands by their event type so that a received message is
+        # only passed to the commands listening for its type. The order of the
+        # commands in the configuration file is kept within each group.
+        self._by_event = {}
+        for command in self.commands:
+            self._by_event.setdefault(command.event, []).append(command)
+
+        # Additionally, index the active commands by their event type and note
+        # or control number. A received message then directly selects the
+        # commands it can trigger. The index holds tuples of the execute
+        # methods of the commands so that dispatching does not need to look
+        # them up for every message. The index is not used for debug output
+        # since it skips the commands which do not match the message.
+        dispatch = {}
+        for command in self.commands:
+            if not command.active:
+                continue
+            numbers = command.note if command.event in ('note_on', 'note_off') else command.control
+            for number in numbers:
+                dispatch.setdefault((command.event, number), []).append(command.execute)
+        self._dispatch = {key: tuple(executes) for key, executes in dispatch.items()}
+
+        # Only messages of the types used in the index need to be queued at
+        # all. For debug output, all messages are queued and printed.
+        if self.verbosity_level < 2:
+            self._message_types = frozenset(event for event, _ in self._dispatch)
+
+        if self.verbosity_level:
+            print(f"Found {len(self.commands)} command(s) in the configuration file.\n")
+            for i, command in enumerate(self.commands, start=1):
+                print(f"{i}: {command.name}")
+                command.print_command_details()
+                print()
+            print()
+
+
+    def read_config_file(self):
+        """Read the configuration file and create the Command objects."""
+        import tomllib  # Imported here since it is not needed if the commands are cached.
+
+        # The file is read into memory at once and parsed from the string.
         try:
-            with open(self.config_file, 'rb') as file:
-                config = tomllib.load(file)
+            with open(self.config_file, encoding='utf-8') as file:
+                config = tomllib.loads(file.read())
         except FileNotFoundError:
             print("Configuration file not found.")
             sys.exit(1)
-        except tomllib.TOMLDecodeError as error:
+        except (tomllib.TOMLDecodeError, UnicodeDecodeError) as error:
             print(f"Error decoding configuration file: {error}")
             sys.exit(1)
 
@@ -331,56 +571,175 @@ class MIDILauncher:
         for cmd in config.get('commands', []):
             if not cmd:
                 continue
-            command = Command(cmd)
+            command = Command.from_config(cmd)
             self.commands.append(command)
 
-        if self.verbosity_level:
-            print(f"Found {len(self.commands)} command(s) in the configuration file.\n")
-            for i, command in enumerate(self.commands, start=1):
-                print(f"{i}: {command.name}")
-                command.print_command_details()
-                print()
-            print()
+
+    # The parsed commands are cached in a pickle file in the user's cache
+    # directory. The file name is derived from the absolute path of the
+    # configuration file. The cache is only used if the modification time and
+    # the size of the configuration file as well as the code of this program
+    # are unchanged.
+
+    def _command_cache_file(self) -> str:
+        """Return the path of the cache file for the configuration file."""
+        cache_dir = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+        config_path = os.path.abspath(self.config_file)
+        name = hashlib.sha256(config_path.encode('utf-8', 'surrogateescape')).hexdigest()[:32]
+        return os.path.join(cache_dir, 'midi_launcher', f"{name}.pkl")
+
+
+    def _command_cache_key(self):
+        """Return the key identifying the current state of the configuration file."""
+        try:
+            stat = os.stat(self.config_file)
+        except OSError:
+            return None
+        code_hash = _code_hash()
+        if code_hash is None:
+            return None
+        return (code_hash, stat.st_mtime_ns, stat.st_size)
+
+
+    def load_command_cache(self, cache_key) -> bool:
+        """Load the commands from the cache file and print the stored parsing
+        messages; return True on success."""
+        if cache_key is None:
+            return False
+        try:
+            with open(self._command_cache_file(), 'rb') as file:
+                stored_key, commands, messages = pickle.load(file)
+        except Exception:  # A missing or broken cache file is never fatal.
+            return False
+        if stored_key != cache_key:
+            return False
+        print(messages, end='')
+        self.commands = commands
+        return True
+
+
+    def save_command_cache(self, cache_key, messages=''):
+        """Save the commands and the parsing messages to the cache file; errors
+        are ignored."""
+        if cache_key is None:
+            return
+        # The cache is written to a temporary file first which then replaces
+        # the cache file so that concurrently running instances never read a
+        # partially written file.
+        cache_file = self._command_cache_file()
+        temp_file = f"{cache_file}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+            with open(temp_file, 'wb') as file:
+                pickle.dump((cache_key, self.commands, messages), file)
+            os.replace(temp_file, cache_file)
+        except (OSError, pickle.PicklingError):
+            with contextlib.suppress(OSError):
+                os.remove(temp_file)
+
+
+    def drain_messages(self, port, message) -> list:
+        """Take all pending messages from the queue.
+
+        The given (port, message) pair is the first message; a list of
+        (port, message) tuples is returned in the order they were received.
+        """
+        messages = [(port, message)]
+        try:
+            while True:
+                messages.append(self.queue.get_nowait())
+        except queue.Empty:
+            return messages
+
+
+    def coalesce_messages(self, port, message) -> list:
+        """Take all pending messages from the queue and coalesce them.
+
+        Of several control change messages for the same port, channel, and
+        control only the most recent one is kept since the earlier values are
+        superseded anyway. All other messages are kept as they are. The given
+        (port, message) pair is the first message; a list of (port, message)
+        tuples is returned in the order they were received.
+        """
+        pending = {}
+        index = 0
+        while True:
+            if message.type == 'control_change':
+                key = (port.name, message.channel, message.control)
+                pending.pop(key, None)  # Move the key to the end.
+            else:
+                key = index
+                index += 1
+            pending[key] = (port, message)
+            try:
+                port, message = self.queue.get_nowait()
+            except queue.Empty:
+                return list(pending.values())
+
+
+    def dispatch(self, port, message):
+        """Pass a received message to the commands listening for it."""
+        if self.verbosity_level >= 2:
+            print(f"\n{port._display_name}: {message}")
+            for command in self._by_event.get(message.type, ()):
+                command.execute(message, port._name_lower,
+                verbosity_level=self.verbosity_level)
+            return
+
+        if message.type == 'control_change':
+            executes = self._dispatch.get(('control_change', message.control), ())
+        elif message.type in ('note_on', 'note_off'):
+            executes = self._dispatch.get((message.type, message.note), ())
+        else:
+            return
+        port_name = port._name_lower
+        for execute in executes:
+            execute(message, port_name, self.verbosity_level)
 
 
     def run(self):
         print("Listening for MIDI messages...\n")
 
-        # Poll for MIDI messages and launch the commands.
+        # Wait for MIDI messages and launch the commands.
 
         try:
             last_update = time.time()
             while True:
+                # Block until a message is received. The timeout makes sure
+                # that the list of input ports is renewed even if no messages
+                # are received at all.
+                try:
+                    port, message = self.queue.get(timeout=max(0, last_update + 5 - time.time()))
+                except queue.Empty:
+                    reap_processes()
+                else:
+                    # Process all messages received in the meantime as one
+                    # batch; terminated processes are reaped once per batch.
+                    if self.coalesce_cc:
+                        messages = self.coalesce_messages(port, message)
+                    else:
+                        messages = self.drain_messages(port, message)
+                    for port, message in messages:
+                        self.dispatch(port, message)
+                    reap_processes()
+
                 # Renew the list of input ports every 5 seconds. If any new
                 # ports are added or removed, notify the user and update the
                 # list of open ports. This is useful when a new MIDI device is
                 # connected or disconnected while the program is running. Handle
                 # InvalidPortError exceptions when updating the list of open
-                # ports.
+                # ports. The port enumeration can be expensive depending on the
+                # MIDI backend, so it is done at most once per interval.
                 if time.time() - last_update > 5:
+                    last_update = time.time()
                     try:
                         input_ports = mido.get_input_names()
                     except InvalidPortError as error:
                         print(f"\nError updating the list of input ports: {error}")
                         continue
-                    if input_ports != [port.name for port in self.open_ports]:
+                    if set(input_ports) != self._open_names_set:
                         print("\nInput ports have changed. Updating the list of open ports.")
-                        self.open_ports = self.get_input_ports()
-                        last_update = time.time()
-
-                # Poll the open ports for MIDI messages and launch the commands.
-                for port in self.open_ports:
-                    for message in port.iter_pending():
-                        if self.ignore_clock and message.type == 'clock':
-                            continue
-                        if self.verbosity_level >= 2:
-                            print(f"\n{port.name.split(':')[0]}: {message}")
-                        for command in self.commands:
-                            command.execute(message, port.name,
-                            verbosity_level=self.verbosity_level)
-
-                # Sleep for a short time to avoid using too much CPU time.
-                time.sleep(0.01)
+                        self._sync_ports(input_ports)
         except KeyboardInterrupt:
             time.sleep(0.1)
 
@@ -389,21 +748,90 @@ class MIDILauncher:
 # Command class                                                               #
 ###############################################################################
 
+# Placeholders in the command string that are substituted before launching it.
+_PLACEHOLDER_RE = re.compile(r'\$VELOCITY|\$VALUE|\$PERCENTAGE|\$DECIMAL')
+
+# Substitutes for the $VALUE/$VELOCITY and $PERCENTAGE placeholders for all
+# possible MIDI values (0-127). The percentage is an integer between 0 and 100.
+# The substitutes for $DECIMAL depend on the mapping field of the command.
+_VALUE_STR = [str(value) for value in range(128)]
+_PERCENTAGE_STR = [str(round(value / 127 * 100)) for value in range(128)]
+
+# Characters with a special meaning to the shell. Commands containing any of
+# them (apart from the placeholders) are always launched via the shell.
+_SHELL_CHARS = frozenset('|&;<>()$`\\*?[]{}~#\n')
+
+
+@dataclasses.dataclass(slots=True, eq=False)
 class Command:
-    """A class to represent a command to launch when a specific MIDI event is received."""
-
-    def __init__(self, config):
-        self.active = config.get('active', True)
-        self.channels = config.get('channels', 'all')
-        self.command = config.get('command')
-        self.control = config.get('control', 'all')
-        self.event = config.get('event')
-        self.mapping = config.get('mapping', [0, 127])
-        self.name = config.get('name')
-        self.note = config.get('note', 'all')
-        self.ports = config.get('ports', 'all')
-        self.values = config.get('values', 'all')
-        self.velocities = config.get('velocities', 'all')
+    """A class to represent a command to launch when a specific MIDI event is received.
+
+    The public fields correspond to the fields of a command section in the
+    configuration file (see config_file_help_text). Use Command.from_config()
+    to create a Command object from such a section. The numeric fields and the
+    ports field are parsed when the object is created.
+    """
+
+    active: bool = True
+    channels: int|str|list|frozenset = 'all'
+    coalesce: bool = False
+    command: str|None = None
+    control: int|str|list|frozenset = 'all'
+    debounce_ms: int|float = 0
+    event: str|None = None
+    mapping: str|list = dataclasses.field(default_factory=lambda: [0, 127])
+    name: str|None = None
+    note: int|str|list|frozenset = 'all'
+    ports: str|list = 'all'
+    values: int|str|list|frozenset = 'all'
+    velocities: int|str|list|frozenset = 'all'
+    wait: bool = False
+
+    # Implementation of the execute method, see _select_execute(). It is called
+    # as execute(message, port_name, verbosity_level=0) with the lowercase name
+    # of the port that received the message.
+    execute: collections.abc.Callable = dataclasses.field(default=None, init=False, repr=False)
+
+    # Internal state which is derived from the fields above by the parse
+    # methods or which is used for debouncing.
+    _channels_any: bool = dataclasses.field(default=False, init=False, repr=False)
+    _command_argv: list|None = dataclasses.field(default=None, init=False, repr=False)  # Arguments for every MIDI value if no shell is needed
+    _command_str: list = dataclasses.field(default=None, init=False, repr=False)  # Command string for every MIDI value
+    _controls_any: bool = dataclasses.field(default=False, init=False, repr=False)
+    _decimal_str: list = dataclasses.field(default=None, init=False, repr=False)
+    _last_launch: float = dataclasses.field(default=-math.inf, init=False, repr=False)  # Time of the last launch (time.monotonic())
+    _map_base: float = dataclasses.field(default=0.0, init=False, repr=False)
+    _map_scale: float = dataclasses.field(default=1.0, init=False, repr=False)
+    _notes_any: bool = dataclasses.field(default=False, init=False, repr=False)
+    _port_matches: dict = dataclasses.field(default_factory=dict, init=False, repr=False)  # Lowercase port name -> match result
+    _port_regex: re.Pattern|None = dataclasses.field(default=None, init=False, repr=False)
+    _ports_any: bool = dataclasses.field(default=False, init=False, repr=False)
+    _timer: threading.Timer|None = dataclasses.field(default=None, init=False, repr=False)  # Timer of a pending coalesced launch
+    _values_any: bool = dataclasses.field(default=False, init=False, repr=False)
+    _velocities_any: bool = dataclasses.field(default=False, init=False, repr=False)
+
+
+    @classmethod
+    def from_config(cls, config):
+        """Create a Command object from a command section (dict) of the configuration file."""
+        return cls(active=config.get('active', True),
+                   channels=config.get('channels', 'all'),
+                   coalesce=config.get('coalesce', False),
+                   command=config.get('command'),
+                   control=config.get('control', 'all'),
+                   debounce_ms=config.get('debounce_ms', 0),
+                   event=config.get('event'),
+                   mapping=config.get('mapping', [0, 127]),
+                   name=config.get('name'),
+                   note=config.get('note', 'all'),
+                   ports=config.get('ports', 'all'),
+                   values=config.get('values', 'all'),
+                   velocities=config.get('velocities', 'all'),
+                   wait=config.get('wait', False))
+
+
+    def __post_init__(self):
+        self.execute = self._execute_generic
 
         # Check for valid event type.
         try:
@@ -419,19 +847,42 @@ class Command:
 
         self.parse_channels()
         self.parse_controls()
+        self.parse_debounce()
         self.parse_mapping()
         self.parse_notes()
         self.parse_ports()
         self.parse_values()
         self.parse_velocities()
 
+        self.prepare_command_strings()
+        self._select_execute()
+
+
+    def _select_execute(self):
+        """Select the implementation of the execute method for this command.
+
+        Most commands only restrict the note or control number. For these, a
+        specialized implementation is used that skips all checks which cannot
+        fail. All other commands use the generic implementation.
+        """
+        self.execute = self._execute_generic
+        if not self.active or self.debounce_ms or not (self._ports_any and self._channels_any):
+            return
+        if self.event in ('note_on', 'note_off') and self._velocities_any:
+            self.execute = self._execute_note
+        elif self.event == 'control_change' and self._values_any:
+            self.execute = self._execute_control
+
 
-    def execute(self, message, port_name, verbosity_level=0):
+    def _execute_generic(self, message, port_name, verbosity_level=0):
         """Execute the command if the message matches the command criteria.
-        
+
+        This method is called via the execute field of the command which holds
+        the implementation selected by _select_execute().
+
         Parameters:
           - message: The MIDI message to check against the command criteria.
-          - port_name: The name of the port that received the message.
+          - port_name: The lowercase name of the port that received the message.
           - verbose: A boolean flag to print debug messages to the console.
         """
 
@@ -446,63 +897,197 @@ class Command:
             return
 
         # Check if the current port name matches the stored port field. Matching
-        # is done partially and case-insensitively.
-        port_name_matches = [port in port_name.lower() for port in self.ports]
-        if self.ports != ['all'] and not any(port_name_matches):
-            if verbosity_level >= 2:
-                print(f"Command '{self.name}' does not match the port.")
-            return
+        # is done partially and case-insensitively. Since there are only a few
+        # ports, the result is remembered for each port name.
+        if not self._ports_any:
+            port_matches = self._port_matches.get(port_name)
+            if port_matches is None:
+                port_matches = self._port_matches[port_name] = (self._port_regex is not None
+                                                                and self._port_regex.search(port_name) is not None)
+            if not port_matches:
+                if verbosity_level >= 2:
+                    print(f"Command '{self.name}' does not match the port.")
+                return
 
         channel = message.channel + 1  # MIDI channels are numbered from 0 to 15.
-        if channel not in self.channels:
+        if not self._channels_any and channel not in self.channels:
             if verbosity_level >= 2:
                 print(f"Command '{self.name}' does not match the channel.")
             return
 
         value = 0
         if self.event in ('note_on', 'note_off'):
-            if self.note != 'all' and message.note not in self.note:
+            if not self._notes_any and message.note not in self.note:
                 if verbosity_level >= 2:
                     print(f"Command '{self.name}' does not match the note.")
                 return
-            if message.velocity not in self.velocities:
+            if not self._velocities_any and message.velocity not in self.velocities:
                 if verbosity_level >= 2:
                     print(f"Command '{self.name}' does not match the velocity.")
                 return
             value = message.velocity
         elif self.event == 'control_change':
-            if message.control not in self.control:
+            if not self._controls_any and message.control not in self.control:
                 if verbosity_level >= 2:
                     print(f"Command '{self.name}' does not match the control.")
                 return
-            if message.value not in self.values:
+            if not self._values_any and message.value not in self.values:
                 if verbosity_level >= 2:
                     print(f"Command '{self.name}' does not match the value.")
                 return
             value = message.value
-        percentage = round(value / 127 * 100)  # Convert the value to a percentage between 0 and 100.
-        decimal = round(self.mapping[0] + value / 127 * (self.mapping[1] - self.mapping[0]), 2)  # Map the value to the range specified in the mapping field.
 
-        # Subsitute the placeholders $VELOCITY, $VALUE, $PERCENTAGE, and $DECIMAL with the above values.
-        command = self.command.replace('$VELOCITY', str(value))
-        command = command.replace('$VALUE', str(value))
-        command = command.replace('$PERCENTAGE', str(percentage))
-        command = command.replace('$DECIMAL', str(decimal))
+        # Debounce the command if requested. With coalescing, every message
+        # restarts the timer so that only the last message of a burst launches
+        # the command once the burst is over. Otherwise, the command is launched
+        # for the first message of a burst and further messages are dropped
+        # until the debounce time has elapsed.
+        if self.debounce_ms:
+            if self.coalesce:
+                if self._timer is not None:
+                    self._timer.cancel()
+                self._timer = threading.Timer(self.debounce_ms / 1000, self.launch, args=(value, verbosity_level))
+                self._timer.daemon = True
+                self._timer.start()
+                return
+            now = time.monotonic()
+            if (now - self._last_launch) * 1000 < self.debounce_ms:
+                if verbosity_level >= 2:
+                    print(f"Command '{self.name}' is debounced.")
+                return
+            self._last_launch = now
 
-        # Launch the command
+        self.launch(value, verbosity_level)
+
+
+    def _execute_note(self, message, port_name, verbosity_level=0):
+        """Specialized execute method for note commands that match all ports,
+        channels, and velocities and that are not debounced."""
+        if verbosity_level >= 2 or self.event != message.type:
+            self._execute_generic(message, port_name, verbosity_level)
+            return
+        if not self._notes_any and message.note not in self.note:
+            return
+        self.launch(message.velocity, verbosity_level)
+
+
+    def _execute_control(self, message, port_name, verbosity_level=0):
+        """Specialized execute method for control change commands that match
+        all ports, channels, and values and that are not debounced."""
+        if verbosity_level >= 2 or self.event != message.type:
+            self._execute_generic(message, port_name, verbosity_level)
+            return
+        if not self._controls_any and message.control not in self.control:
+            return
+        self.launch(message.value, verbosity_level)
+
+
+    def substitute_placeholders(self, value, text=None) -> str:
+        """Return the command string (or the given text) with the placeholders
+        $VELOCITY, $VALUE, $PERCENTAGE, and $DECIMAL substituted (in a single
+        pass) for the given MIDI value."""
+        substitutions = {'$VELOCITY': _VALUE_STR[value],
+                         '$VALUE': _VALUE_STR[value],
+                         '$PERCENTAGE': _PERCENTAGE_STR[value],
+                         '$DECIMAL': self._decimal_str[value]}
+        return _PLACEHOLDER_RE.sub(lambda match: substitutions[match.group()], self.command if text is None else text)
+
+
+    def prepare_command_strings(self):
+        """Precompute the command string for every possible MIDI value (0-127).
+
+        Since there are only 128 possible values, the placeholders are
+        substituted once when the command is created instead of every time a
+        message is received. Commands without placeholders simply share the
+        same string for all values.
+
+        Simple commands, i.e. commands without any characters with a special
+        meaning to the shell, are additionally split into their arguments so
+        that they can be started without a shell. Since the placeholders are
+        only substituted by numbers, the command is split before substituting
+        them. On Windows, the shell is always used.
+        """
+        self._command_argv = None
+        if not isinstance(self.command, str):
+            self._command_str = [self.command] * 128
+            return
+
+        has_placeholders = _PLACEHOLDER_RE.search(self.command) is not None
+        if has_placeholders:
+            self._command_str = [self.substitute_placeholders(value) for value in range(128)]
+        else:
+            self._command_str = [self.command] * 128
+
+        if os.name == 'nt' or not _SHELL_CHARS.isdisjoint(_PLACEHOLDER_RE.sub('', self.command)):
+            return
+        try:
+            argv = shlex.split(self.command)
+        except ValueError:  # E.g. unbalanced quotes; leave the error to the shell.
+            return
+        if not argv or '=' in argv[0]:  # Empty command or variable assignment
+            return
+        if has_placeholders:
+            self._command_argv = [[self.substitute_placeholders(value, arg) for arg in argv] for value in range(128)]
+        else:
+            self._command_argv = [argv] * 128
+
+
+    def launch(self, value, verbosity_level=0):
+        """Launch the command for the given MIDI value.
+
+        Parameters:
+          - value: The MIDI value (0-127) substituted for the placeholders.
+          - verbosity_level: The verbosity level for printing debug messages.
+        """
+        command = self._command_str[value]
         if verbosity_level:
             print(f"Executing command '{self.name}': {command}")
-        subprocess.run(command, shell=True, check=False)
+
+        # Simple commands are started directly, see prepare_command_strings().
+        # If the program cannot be started this way (e.g. because it is a
+        # shell builtin), the command is passed to the shell after all.
+        if self._command_argv is not None:
+            try:
+                self._spawn(self._command_argv[value], shell=False)
+                return
+            except OSError:
+                pass
+        self._spawn(command, shell=True)
+
+
+    def _spawn(self, args, shell):
+        """Start a process for the given arguments."""
+        # By default, the command is launched in the background so that the
+        # processing of the MIDI messages is not blocked while it is running.
+        if self.wait:
+            subprocess.run(args, shell=shell, check=False)
+        else:
+            _processes.append(subprocess.Popen(args, shell=shell, start_new_session=True))
 
 
+    # The numeric fields are stored as frozensets since they are only used for
+    # membership tests when a message is received. If a field covers its whole
+    # range (e.g. "all"), an additional flag is set so that the membership test
+    # can be skipped entirely.
+
     def parse_channels(self):
-        """ Parse the channels field and overwrite it with a list of channel numbers."""
-        self.channels = parse_user_input(self.channels, default_range=(1, 16), header_text=f"Command (channels field): {self.name}\n")
+        """ Parse the channels field and overwrite it with a set of channel numbers."""
+        self.channels = parse_user_input_set(self.channels, default_range=(1, 16), header_text=f"Command (channels field): {self.name}\n")
+        self._channels_any = self.channels.issuperset(range(1, 17))
 
 
     def parse_controls(self):
-        """ Parse the control field and overwrite it with a list of control numbers."""
-        self.control = parse_user_input(self.control, default_range=(0, 127), header_text=f"Command (controls field): {self.name}\n")
+        """ Parse the control field and overwrite it with a set of control numbers."""
+        self.control = parse_user_input_set(self.control, default_range=(0, 127), header_text=f"Command (controls field): {self.name}\n")
+        self._controls_any = self.control.issuperset(range(128))
+
+
+    def parse_debounce(self):
+        """ Parse the debounce_ms field; invalid values disable debouncing."""
+        if isinstance(self.debounce_ms, bool) or not isinstance(self.debounce_ms, int|float) or self.debounce_ms < 0:
+            print(f"Command: {self.name}")
+            print(f"Error parsing the debounce_ms field: '{self.debounce_ms}'. Ignoring the debounce_ms field.\n")
+            self.debounce_ms = 0
 
 
     def parse_mapping(self):
@@ -515,34 +1100,34 @@ class Command:
         #   is ignored and the mapping field is set to [0, 127].
         # - The keyword "all" is converted to [0, 127].
 
-        if isinstance(self.mapping, list):
-            if len(self.mapping) == 2:
-                return
-            else:
-                print(f"Command: {self.name}")
-                print(f"Error parsing the mapping field: '{self.mapping}'. Ignoring the mapping field.\n")
-                self.mapping = [0, 127]
-                return
-        elif isinstance(self.mapping, str):
-            if self.mapping == 'all':
-                self.mapping = [0, 127]
-                return
+        mapping = self.mapping
+        if mapping == 'all':
+            mapping = [0, 127]
+        elif isinstance(mapping, str):
             try:
-                self.mapping = [float(item) for item in self.mapping.split(',')]
+                mapping = [float(item) for item in mapping.split(',')]
             except ValueError:
-                print(f"Command: {self.name}")
-                print(f"Error parsing the mapping field: '{self.mapping}'. Ignoring the mapping field.\n")
-                return
-            if len(self.mapping) != 2:
-                self.mapping = [0, 127]
-                print(f"Command: {self.name}")
-                print(f"Error parsing the mapping field: '{self.mapping}'. Ignoring the mapping field.\n")
-                return
+                pass
+        if not (isinstance(mapping, list) and len(mapping) == 2 and all(isinstance(item, int|float) for item in mapping)):
+            print(f"Command: {self.name}")
+            print(f"Error parsing the mapping field: '{self.mapping}'. Ignoring the mapping field.\n")
+            mapping = [0, 127]
+        self.mapping = mapping
+
+        # The mapping is linear: decimal = base + value * scale. Since MIDI
+        # values are integers between 0 and 127, the substitutes for the
+        # $DECIMAL placeholder can be computed once for all values. (Values
+        # exactly halfway between two hundredths may round differently than
+        # with start + value / 127 * (end - start), e.g. 2.29 instead of 2.28.)
+        self._map_base = float(self.mapping[0])
+        self._map_scale = (float(self.mapping[1]) - float(self.mapping[0])) / 127.0
+        self._decimal_str = [str(round(self._map_base + value * self._map_scale, 2)) for value in range(128)]
+
 
-            
     def parse_notes(self):
-        """ Parse the note field and overwrite it with a list of note numbers."""
-        self.note = parse_user_input(self.note, default_range=(0, 127), header_text=f"Command (note field): {self.name}\n")
+        """ Parse the note field and overwrite it with a set of note numbers."""
+        self.note = parse_user_input_set(self.note, default_range=(0, 127), header_text=f"Command (note field): {self.name}\n")
+        self._notes_any = self.note.issuperset(range(128))
 
 
     def parse_ports(self):
@@ -564,45 +1149,69 @@ class Command:
         if isinstance(self.ports, list):
             self.ports = [port.lower() for port in self.ports]
 
+        # An empty port name is contained in every port name.
+        self._ports_any = self.ports == ['all'] or '' in self.ports
+
+        # Matching against all port names at once is done with a single regular
+        # expression that searches for any of them. An empty list of port names
+        # matches no port at all.
+        if self._ports_any or not self.ports:
+            self._port_regex = None
+        else:
+            self._port_regex = re.compile('|'.join(re.escape(port) for port in self.ports))
+
 
     def parse_values(self):
-        """ Parse the values field and overwrite it with a list of values."""
-        self.values = parse_user_input(self.values, default_range=(0, 127), header_text=f"Command (values field): {self.name}\n")
+        """ Parse the values field and overwrite it with a set of values."""
+        self.values = parse_user_input_set(self.values, default_range=(0, 127), header_text=f"Command (values field): {self.name}\n")
+        self._values_any = self.values.issuperset(range(128))
 
 
     def parse_velocities(self):
-        """ Parse the velocities field and overwrite it with a list of velocities."""
-        self.velocities = parse_user_input(self.velocities, default_range=(0, 127), header_text=f"Command (velocities field): {self.name}\n")
+        """ Parse the velocities field and overwrite it with a set of velocities."""
+        self.velocities = parse_user_input_set(self.velocities, default_range=(0, 127), header_text=f"Command (velocities field): {self.name}\n")
+        self._velocities_any = self.velocities.issuperset(range(128))
 
     def print_command_details(self):
         """Print the details of the command."""
+
+        # The parsed numeric fields are sets; print them as sorted lists.
+        # Commands with an invalid event type have not been parsed at all.
+        channels = sorted(self.channels) if isinstance(self.channels, frozenset) else self.channels
         print(f"   Active: {self.active}")
-        print(f"   Channels: {self.channels}")
+        print(f"   Channels: {channels}")
+        print(f"   Coalesce: {self.coalesce}")
         print(f"   Command: {self.command}")
+        print(f"   Debounce: {self.debounce_ms} ms")
         if self.event == 'control_change':
             # Control numbers
-            if len(self.control) > 16:
-                print(f"   Controls: {self.control[:16]} (truncated)")
+            control = sorted(self.control)
+            if len(control) > 16:
+                print(f"   Controls: {control[:16]} (truncated)")
             else:  
-                print(f"   Controls: {self.control[:16]}")
+                print(f"   Controls: {control[:16]}")
             print(f"   Event: {self.event}")
             # Values
-            if len(self.values) > 16:
-                print(f"   Values: {self.values[:16]} (truncated)")
+            values = sorted(self.values)
+            if len(values) > 16:
+                print(f"   Values: {values[:16]} (truncated)")
             else:
-                print(f"   Values: {self.values[:16]}")
+                print(f"   Values: {values[:16]}")
         if self.event == 'note_on' or self.event == 'note_off':
             # Notes
-            if len(self.note) > 16:
-                print(f"   Notes: {self.note[:16]} (truncated)")
+            note = sorted(self.note)
+            if len(note) > 16:
+                print(f"   Notes: {note[:16]} (truncated)")
             else:
-                print(f"   Notes: {self.note[:16]}")
+                print(f"   Notes: {note[:16]}")
             # Velocities
-            if len(self.velocities) > 16:
-                print(f"   Velocities: {self.velocities[:16]} (truncated)")
+            velocities = sorted(self.velocities)
+            if len(velocities) > 16:
+                print(f"   Velocities: {velocities[:16]} (truncated)")
             else:
-                print(f"   Velocities: {self.velocities[:16]}")
+                print(f"   Velocities: {velocities[:16]}")
         print(f"   Ports: {self.ports}")
+        print(f"   Wait: {self.wait}")
 
 
 ###############################################################################
@@ -618,6 +1227,11 @@ MIDI events are received.
 The command sections are launched in the order they appear in the configuration
 file. They must be given as an array of tables called "commands".
 
+To speed up the start, the parsed configuration file is cached in the directory
+"midi_launcher" within the user's cache directory ($XDG_CACHE_HOME or ~/.cache).
+The cache is renewed automatically whenever the configuration file is changed;
+it can be deleted at any time.
+
 The command sections contain the following fields:
 
     active:     A boolean value that specifies whether the command is active. If
@@ -628,6 +1242,15 @@ The command sections contain the following fields:
                 and defaults to "all". The syntax of this field is the same as
                 for the values field (see below).
 
+    coalesce:   A boolean value that specifies how bursts of MIDI messages are
+                debounced (see the debounce_ms field). If set to true, only the
+                last message of a burst launches the command once no further
+                message has been received for debounce_ms milliseconds. This is
+                useful for knobs and faders where only the final value matters.
+                If set to false, the first message of a burst launches the
+                command and further messages are ignored for debounce_ms
+                milliseconds. This field is optional and defaults to false.
+
     command:    The command to be launched when the specified MIDI event is
                 received. It must be given as a string. The command string can
                 contain one or more of the following placeholders which will be
@@ -649,6 +1272,12 @@ The command sections contain the following fields:
                 The syntax of this field is the same as for the values field
                 (see below).
 
+    debounce_ms: The minimum time in milliseconds between two launches of the
+                command. Messages that are received in between are ignored or
+                coalesced (see the coalesce field). This field is optional and
+                defaults to 0, i.e., the command is launched for every matching
+                message.
+
     event:      The type of MIDI event to listen for. Valid values are
                 note_on", "note_off", and "control_change". This field is
                 required.
@@ -714,6 +1343,11 @@ The command sections contain the following fields:
                 the "note_on" and "note_off" event types. For the syntax of this
                 field, see the values field above.
 
+    wait:       A boolean value that specifies whether to wait for the launched
+                command to finish before processing further MIDI messages. This
+                field is optional and defaults to false, i.e., the command is
+                launched in the background.
+
 
 Example configuration file:
 
@@ -736,48 +1370,126 @@ ports = "LPD8"
 """
 
 
-class CustomHelpFormatter(argparse.HelpFormatter):
-    def __init__(self, *args, **kwargs):
-        # Set the width of the options column
-        kwargs['max_help_position'] = 35
-        super().__init__(*args, **kwargs)
-
-
-def parse_arguments():
-    """Parse the command-line arguments."""
-    parser = argparse.ArgumentParser(description="Monitor MIDI messages and launch commands based on the messages received.",
-                                     add_help=False,
-                                     formatter_class=CustomHelpFormatter)
-
-    parser.add_argument("-c", "--config-file",
-                        nargs=1,
-                        default="config.toml",
-                        help="Specify the configuration file to use.",
-                        metavar="FILE")
-    parser.add_argument("-h", "--help",
-                        action="help",
-                        help="Show this help message and exit.")
-    parser.add_argument("-H", "--config-file-help",
-                        action="store_true",
-                        help="Show help for the configuration file.")
-    parser.add_argument("-i", "--ignore-clock",
-                        action="store_true",
-                        help="Ignore MIDI clock messages.")
-    parser.add_argument("-l", "--list-ports",
-                        action="store_true",
-                        help="List the available MIDI input ports and exit.")
-    parser.add_argument("-V", "--verbose",
-                        action="count",
-                        default=0,
-                        help="Print status and debug messages to the console. "
-                             "Use multiple times for more verbosity.")
-    parser.add_argument("-v", "--version",
-                        action="version",
-                        version="",  # f"MIDI Launcher v{VERSION_NUMBER}",
-                        help="Show the version number and exit.")
-
-    return parser.parse_args()
+help_text = """\
+usage: {prog} [--coalesce-cc] [-c FILE] [-h] [-H] [-i] [-l] [-V] [-v]
+
+Monitor MIDI messages and launch commands based on the messages received.
+
+options:
+  --coalesce-cc                Only process the latest of several pending
+                               control change messages for the same control.
+  -c FILE, --config-file FILE  Specify the configuration file to use.
+  -h, --help                   Show this help message and exit.
+  -H, --config-file-help       Show help for the configuration file.
+  -i, --ignore-clock           Ignore MIDI clock messages.
+  -l, --list-ports             List the available MIDI input ports and exit.
+  -V, --verbose                Print status and debug messages to the console.
+                               Use multiple times for more verbosity.
+  -v, --version                Show the version number and exit.
+"""
+
+# Short and long forms of the command-line options. The options are parsed by
+# hand since importing argparse takes a noticeable part of the start-up time.
+_short_options = {'c': '--config-file', 'h': '--help', 'H': '--config-file-help',
+                  'i': '--ignore-clock', 'l': '--list-ports', 'V': '--verbose',
+                  'v': '--version'}
+_long_options = ('--coalesce-cc', '--config-file', '--config-file-help', '--help',
+                 '--ignore-clock', '--list-ports', '--verbose', '--version')
+
+# Names of the options used in error messages, e.g. "-c/--config-file".
+_option_names = {option: option for option in _long_options}
+_option_names.update({option: f"-{letter}/{option}" for letter, option in _short_options.items()})
+
+
+def parse_arguments(argv=None) -> types.SimpleNamespace:
+    """Parse the command-line arguments.
+
+    Short options may be combined (e.g. -VVi) and long options may be
+    abbreviated as long as they are unambiguous. If the arguments are invalid,
+    an error message is printed and the program exits with status 2.
+    """
+    prog = os.path.basename(sys.argv[0])
+    args = types.SimpleNamespace(coalesce_cc=False,
+                                 config_file='config.toml',
+                                 config_file_help=False,
+                                 ignore_clock=False,
+                                 list_ports=False,
+                                 verbose=0)
+
+    def error(message):
+        print(help_text.format(prog=prog).splitlines()[0], file=sys.stderr)
+        print(f"{prog}: error: {message}", file=sys.stderr)
+        sys.exit(2)
+
+    # Like argparse, the arguments are processed in two passes. First, each
+    # argument is classified as an option (option string and value, the value
+    # is None unless given as --option=value, -c=FILE, or -cFILE) or as a
+    # positional argument (None, argument); all arguments after "--" are
+    # positional. Unrecognized options are marked by an empty option string.
+    # Ambiguous abbreviations are reported right away.
+    classified = []
+    arguments = list(sys.argv[1:] if argv is None else argv)
+    for index, argument in enumerate(arguments):
+        if argument == '--':
+            classified.extend((None, argument) for argument in arguments[index:])
+            break
+        if not argument.startswith('-') or argument == '-':
+            classified.append((None, argument))
+        elif argument.startswith('--'):
+            name, separator, value = argument.partition('=')
+            matches = [option for option in _long_options if option.startswith(name)]
+            if name in _long_options:
+                matches = [name]
+            if len(matches) > 1:
+                error(f"ambiguous option: {name} could match {', '.join(matches)}")
+            classified.append((matches[0], value if separator else None) if matches else ('', argument))
+        elif argument[1] in _short_options:
+            name, separator, value = argument.partition('=')
+            if not (separator and len(name) == 2):
+                value = argument[2:] or None
+            classified.append((argument[:2], value))
+        else:
+            classified.append(('', argument))  # Unrecognized option
+
+    # Second, the options are applied in the order they are given, so that
+    # e.g. --help takes effect even if a later argument is invalid. Positional
+    # arguments and unrecognized options are only reported at the end.
+    unrecognized = []
+    while classified:
+        option_string, value = classified.pop(0)
+        if not option_string:
+            unrecognized.append(value)
+            continue
+        option = _short_options.get(option_string[1], option_string)
+        if option == '--config-file':
+            # The configuration file name is taken from the next argument if
+            # it was not given directly; it must not be an option itself.
+            if value is None:
+                if not classified or classified[0][0] is not None or classified[0][1] == '--':
+                    error(f"argument {_option_names[option]}: expected 1 argument")
+                value = classified.pop(0)[1]
+            args.config_file = value
+            continue
+        if value is not None:
+            # Further short options may follow a short option (e.g. -VVi).
+            if not option_string.startswith('--') and value[:1] in _short_options:
+                classified.insert(0, ('-' + value[0], value[1:] or None))
+            else:
+                error(f"argument {_option_names[option]}: ignored explicit argument '{value}'")
+        if option == '--help':
+            print(help_text.format(prog=prog), end="")
+            sys.exit(0)
+        elif option == '--version':
+            sys.exit(0)  # The version number has already been printed.
+        elif option == '--verbose':
+            args.verbose += 1
+        else:
+            setattr(args, option[2:].replace('-', '_'), True)
+
+    if unrecognized:
+        error(f"unrecognized arguments: {' '.join(unrecognized)}")
 
+    return args
 
 
 ###############################################################################
@@ -797,13 +1509,12 @@ def main():
     if args.list_ports:
         list_input_ports()
         sys.exit(0)
-    if isinstance(args.config_file, list):
-        args.config_file = args.config_file[0]
 
     # Create the MIDILauncher object and run it
     executor = MIDILauncher(config_file=args.config_file,
                             verbosity_level=args.verbose,
-                            ignore_clock=args.ignore_clock)
+                            ignore_clock=args.ignore_clock,
+                            coalesce_cc=args.coalesce_cc)
     executor.run()
 
 
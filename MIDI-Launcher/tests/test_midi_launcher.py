@@ -1,14 +1,22 @@
 """Unit test for MIDI-Launcher."""
 
+import contextlib
+import io
 import os
+import queue
 import sys
+import tempfile
+import types
 
 import unittest
-from unittest import TestCase
+from unittest import TestCase, mock
+
+import mido
 
 # Add the parent directory to the path to allow importing the module
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from midi_launcher import parse_user_input
+import midi_launcher
+from midi_launcher import Command, MIDILauncher, parse_arguments, parse_user_input, parse_user_input_set
 
 
 class TestParseUserInput(TestCase):
@@ -17,31 +25,622 @@ class TestParseUserInput(TestCase):
     def test_string_input(self):
         """Test the parse_user_input function."""
 
-        # A single number
-        self.assertEqual(parse_user_input(1), [1])
-
-        # Strings
-        self.assertEqual(parse_user_input(''), [])
-        self.assertEqual(parse_user_input('1'), [1])
-        self.assertEqual(parse_user_input('1, 2, 3'), [1, 2, 3])
-        self.assertEqual(parse_user_input('1 2 3'), [1, 2, 3])
-        self.assertEqual(parse_user_input('1-4'), [1, 2, 3, 4])
-        self.assertEqual(parse_user_input('1:4'), [1, 2, 3, 4])
-        self.assertEqual(parse_user_input('1:4:1'), [1, 2, 3,4])
-        self.assertEqual(parse_user_input('1:4:2'), [1, 3])
-        self.assertEqual(parse_user_input('all', default_range=(1,4)), [1, 2, 3, 4])
-
-        # Lists
-        self.assertEqual(parse_user_input([1]), [1])
-        self.assertEqual(parse_user_input([1, 2, 3]), [1, 2, 3])
-
-        # Comninations
-        self.assertEqual(parse_user_input([1, '2:4', 3]), [1, 2, 3, 4, 3])
-        self.assertEqual(parse_user_input(['all'], default_range=(1,4)), [1, 2, 3, 4])
-        self.assertEqual(parse_user_input([1, 'all', 3], default_range=(1,4)), [1, 1, 2, 3, 4, 3])
-
-        # Nesting
-        self.assertEqual(parse_user_input([1, [2, 3]]), [1, 2, 3])
+        # Each case consists of the positional arguments, the keyword
+        # arguments, and the expected result.
+        cases = [
+            # A single number
+            ((1,), {}, [1]),
+
+            # Strings
+            (('',), {}, []),
+            (('1',), {}, [1]),
+            (('1, 2, 3',), {}, [1, 2, 3]),
+            (('1 2 3',), {}, [1, 2, 3]),
+            (('1-4',), {}, [1, 2, 3, 4]),
+            (('1:4',), {}, [1, 2, 3, 4]),
+            (('1:4:1',), {}, [1, 2, 3, 4]),
+            (('1:4:2',), {}, [1, 3]),
+            (('1:4:0',), {'print_error': lambda text: None}, []),
+            (('all',), {'default_range': (1, 4)}, [1, 2, 3, 4]),
+
+            # Lists
+            (([1],), {}, [1]),
+            (([1, 2, 3],), {}, [1, 2, 3]),
+
+            # Combinations
+            (([1, '2:4', 3],), {}, [1, 2, 3, 4, 3]),
+            ((['all'],), {'default_range': (1, 4)}, [1, 2, 3, 4]),
+            (([1, 'all', 3],), {'default_range': (1, 4)}, [1, 1, 2, 3, 4, 3]),
+
+            # Nesting
+            (([1, [2, 3]],), {}, [1, 2, 3]),
+        ]
+
+        for args, kwargs, expected in cases:
+            with self.subTest(args=args, kwargs=kwargs):
+                self.assertEqual(parse_user_input(*args, **kwargs), expected)
+
+
+    def test_cache_distinguishes_types(self):
+        """Inputs which are equal but of different types are cached separately."""
+
+        ignore = lambda text: None
+        cases = [(60, [60]), (60.0, []), ([60], [60]), ([60.0], [])]
+        for first, second in [(cases[0], cases[1]), (cases[2], cases[3])]:
+            for order in [(first, second), (second, first)]:
+                midi_launcher._parse_user_input_cached.cache_clear()
+                for user_input, expected in order:
+                    with self.subTest(order=order, user_input=user_input):
+                        result = parse_user_input(user_input, print_error=ignore, print_warning=ignore)
+                        self.assertEqual(result, expected)
+
+
+class TestParseUserInputSet(TestCase):
+    """Test the parse_user_input_set function for various inputs."""
+
+    def test_set_input(self):
+        """Test the parse_user_input_set function."""
+
+        self.assertEqual(parse_user_input_set(''), frozenset())
+        self.assertEqual(parse_user_input_set('1, 2, 2'), frozenset({1, 2}))
+        self.assertEqual(parse_user_input_set([1, '2:4', 3]), frozenset({1, 2, 3, 4}))
+        self.assertEqual(parse_user_input_set('all', default_range=(1,4)), frozenset({1, 2, 3, 4}))
+
+        # The set for the keyword "all" is shared between the callers.
+        self.assertIs(parse_user_input_set('all'), parse_user_input_set('all'))
+
+
+class TestParseArguments(TestCase):
+    """Test the parse_arguments function for various command lines."""
+
+    def test_valid_arguments(self):
+        """Test valid command lines."""
+
+        defaults = dict(coalesce_cc=False, config_file='config.toml', config_file_help=False,
+                        ignore_clock=False, list_ports=False, verbose=0)
+
+        # Each case consists of the arguments and the attributes which differ
+        # from the defaults.
+        cases = [
+            ([], {}),
+            (['-V'], {'verbose': 1}),
+            (['-VVi'], {'verbose': 2, 'ignore_clock': True}),
+            (['-V', '-V', '--verbose'], {'verbose': 3}),
+            (['-c', 'file.toml'], {'config_file': 'file.toml'}),
+            (['-cfile.toml'], {'config_file': 'file.toml'}),
+            (['-c=file.toml'], {'config_file': 'file.toml'}),
+            (['-Vc', 'file.toml'], {'verbose': 1, 'config_file': 'file.toml'}),
+            (['--config-file', 'file.toml'], {'config_file': 'file.toml'}),
+            (['--config-file=file.toml'], {'config_file': 'file.toml'}),
+            (['--config-file=-file.toml'], {'config_file': '-file.toml'}),
+            (['-c', '-'], {'config_file': '-'}),
+            (['--coal', '--ign', '--list', '--verb'], {'coalesce_cc': True, 'ignore_clock': True,
+                                                       'list_ports': True, 'verbose': 1}),
+            (['--config-file-h'], {'config_file_help': True}),
+            (['-H', '-l'], {'config_file_help': True, 'list_ports': True}),
+        ]
+        for argv, changes in cases:
+            with self.subTest(argv=argv):
+                self.assertEqual(vars(parse_arguments(argv)), defaults | changes)
+
+        # The help is shown as soon as the option is reached, even if other
+        # arguments are invalid.
+        for argv in (['-h'], ['-h', '--bogus'], ['--bogus', '--help'], ['file.toml', '-Vh']):
+            with self.subTest(argv=argv):
+                stdout = io.StringIO()
+                with contextlib.redirect_stdout(stdout), self.assertRaises(SystemExit) as context:
+                    parse_arguments(argv)
+                self.assertEqual(context.exception.code, 0)
+                self.assertIn("usage:", stdout.getvalue())
+
+    def test_invalid_arguments(self):
+        """Test invalid command lines; an error message is printed and the
+        program exits with status 2."""
+
+        # Each case consists of the arguments and the expected error message.
+        cases = [
+            (['-c'], "argument -c/--config-file: expected 1 argument"),
+            (['-c', '-V'], "argument -c/--config-file: expected 1 argument"),
+            (['--config-file', '--verbose'], "argument -c/--config-file: expected 1 argument"),
+            (['--conf', 'file.toml'], "ambiguous option: --conf could match --config-file, --config-file-help"),
+            (['--ver'], "ambiguous option: --ver could match --verbose, --version"),
+            (['--unknown'], "unrecognized arguments: --unknown"),
+            (['-Vq'], "argument -V/--verbose: ignored explicit argument 'q'"),
+            (['-qV'], "unrecognized arguments: -qV"),
+            (['--unknown', 'file.toml', '-V'], "unrecognized arguments: --unknown file.toml"),
+            (['--conf', '-h'], "ambiguous option: --conf could match --config-file, --config-file-help"),
+            (['--', '-V'], "unrecognized arguments: -- -V"),
+            (['file.toml'], "unrecognized arguments: file.toml"),
+            (['--help=yes'], "argument -h/--help: ignored explicit argument 'yes'"),
+        ]
+        for argv, message in cases:
+            with self.subTest(argv=argv):
+                stderr = io.StringIO()
+                with contextlib.redirect_stderr(stderr), self.assertRaises(SystemExit) as context:
+                    parse_arguments(argv)
+                self.assertEqual(context.exception.code, 2)
+                self.assertIn(f"error: {message}", stderr.getvalue())
+
+
+class TestPorts(TestCase):
+    """Test the matching of the port names of a command."""
+
+    def test_port_matching(self):
+        """Port names are matched partially and case-insensitively."""
+        message = mido.Message('note_on', note=60, velocity=100)
+        cases = [
+            ('all', 'lpd8 midi 1', True),
+            ('LPD8', 'lpd8 midi 1', True),
+            ('LPD8', 'arturia keylab', False),
+            (['Arturia', 'lpd8'], 'lpd8 midi 1', True),
+            (['Arturia', 'lpd8'], 'nanokontrol', False),
+            ([], 'lpd8 midi 1', False),
+        ]
+        for ports, port_name, expected in cases:
+            with self.subTest(ports=ports, port_name=port_name):
+                command = Command(name='test', command='true', event='note_on', ports=ports)
+                with mock.patch.object(Command, 'launch', autospec=True) as launch:
+                    command.execute(message, port_name)
+                self.assertEqual(launch.called, expected)
+
+
+class FakePort:
+    """Replacement for an input port returned by mido.open_input()."""
+
+    def __init__(self, name):
+        self.name = name
+        self.closed = False
+        self.callback = None
+        self._rt = mock.Mock()
+
+    def close(self):
+        self.closed = True
+
+
+class TestSyncPorts(TestCase):
+    """Test the synchronization of the open ports with the available ports."""
+
+    def setUp(self):
+        self.opened = []
+        def open_input(name):
+            port = FakePort(name)
+            self.opened.append(port)
+            return port
+        patcher = mock.patch.object(midi_launcher, 'mido', types.SimpleNamespace(open_input=open_input), create=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        # The launcher is created without calling __init__() so that the real
+        # ports are not opened.
+        self.launcher = MIDILauncher.__new__(MIDILauncher)
+        self.launcher.verbosity_level = 0
+        self.launcher.ignore_clock = False
+        self.launcher.open_ports = []
+        self.launcher._open_names_set = frozenset()
+
+    def test_add_remove_keep(self):
+        """Removed ports are closed, new ports are opened and the remaining
+        ports are kept open."""
+        self.launcher._sync_ports(['LPD8:LPD8 MIDI 1 20:0', 'KeyLab:KeyLab MIDI 24:0'])
+        lpd8, keylab = self.opened
+        self.launcher._sync_ports(['KeyLab:KeyLab MIDI 24:0', 'nanoKONTROL:nanoKONTROL 28:0'])
+        self.assertEqual([port.name for port in self.opened],
+                         ['LPD8:LPD8 MIDI 1 20:0', 'KeyLab:KeyLab MIDI 24:0', 'nanoKONTROL:nanoKONTROL 28:0'])
+        nanokontrol = self.opened[2]
+        self.assertTrue(lpd8.closed)
+        self.assertFalse(keylab.closed)
+        self.assertFalse(nanokontrol.closed)
+        self.assertEqual(self.launcher.open_ports, [keylab, nanokontrol])
+        self.assertEqual(self.launcher._open_names_set,
+                         {'KeyLab:KeyLab MIDI 24:0', 'nanoKONTROL:nanoKONTROL 28:0'})
+        self.assertEqual(nanokontrol._display_name, 'nanoKONTROL')
+        self.assertEqual(nanokontrol._name_lower, 'nanokontrol:nanokontrol 28:0')
+
+        # The callback queues the messages together with the receiving port.
+        self.launcher.queue = queue.Queue()
+        self.launcher._message_types = None
+        message = mido.Message('note_on', note=60)
+        nanokontrol.callback(message)
+        self.assertEqual(self.launcher.queue.get_nowait(), (nanokontrol, message))
+
+    def test_all_ports_removed(self):
+        """All ports are closed if no ports are available anymore, and they are
+        opened again when they return."""
+        self.launcher._sync_ports(['LPD8:LPD8 MIDI 1 20:0'])
+        lpd8 = self.opened[0]
+        self.launcher._sync_ports([])
+        self.assertTrue(lpd8.closed)
+        self.assertEqual(self.launcher.open_ports, [])
+        self.assertEqual(self.launcher._open_names_set, frozenset())
+
+        self.launcher._sync_ports(['LPD8:LPD8 MIDI 1 20:0'])
+        self.assertEqual(len(self.opened), 2)
+        self.assertEqual(self.launcher.open_ports, [self.opened[1]])
+
+    def test_ignore_clock(self):
+        """Timing messages are dropped by the MIDI backend if requested."""
+        self.launcher.ignore_clock = True
+        self.launcher._sync_ports(['LPD8:LPD8 MIDI 1 20:0'])
+        self.opened[0]._rt.ignore_types.assert_called_once_with(sysex=False, timing=True, active_sense=True)
+
+
+class FakeTimer:
+    """Replacement for threading.Timer which is started by hand."""
+
+    def __init__(self, interval, function, args=()):
+        self.function = function
+        self.args = args
+        self.cancelled = False
+        self.daemon = False
+
+    def start(self):
+        pass
+
+    def cancel(self):
+        self.cancelled = True
+
+    def fire(self):
+        if not self.cancelled:
+            self.function(*self.args)
+
+
+class TestDebounce(TestCase):
+    """Test the debouncing of commands."""
+
+    def burst(self, times=(5.0, 5.001, 5.002), **fields):
+        """Send a burst of control change messages to a new command and return
+        the arguments of the launched processes. The messages are received at
+        the given times (time.monotonic()); pending timers are fired at the
+        end."""
+        command = Command(name='test', command='echo $VALUE', event='control_change', **fields)
+        timers = []
+        def create_timer(*args, **kwargs):
+            timers.append(FakeTimer(*args, **kwargs))
+            return timers[-1]
+
+        with mock.patch.object(Command, '_spawn', autospec=True) as spawn, \
+             mock.patch('midi_launcher.threading.Timer', side_effect=create_timer), \
+             mock.patch('midi_launcher.time.monotonic', side_effect=times):
+            for value in (10, 20, 30):
+                command.execute(mido.Message('control_change', control=1, value=value), 'port')
+            for timer in timers:
+                timer.fire()
+        return [call.args[1] for call in spawn.call_args_list]
+
+    def test_leading_edge(self):
+        """Without coalescing, only the first message of a burst launches the command."""
+        # The first message is launched even shortly after booting, i.e. when
+        # time.monotonic() is still smaller than the debounce time.
+        self.assertEqual(self.burst(debounce_ms=10_000), [['echo', '10']])
+        self.assertEqual(self.burst((0.001, 0.002, 0.003), debounce_ms=100), [['echo', '10']])
+
+        # Messages after the debounce time are launched again.
+        self.assertEqual(self.burst((5.0, 5.05, 5.2), debounce_ms=100), [['echo', '10'], ['echo', '30']])
+
+    def test_coalesce(self):
+        """With coalescing, only the last message of a burst launches the command."""
+        self.assertEqual(self.burst(debounce_ms=50, coalesce=True), [['echo', '30']])
+
+    def test_no_debounce(self):
+        """Without debouncing, every message launches the command."""
+        self.assertEqual(self.burst(), [['echo', '10'], ['echo', '20'], ['echo', '30']])
+
+    def test_invalid_values(self):
+        """Invalid debounce_ms values are rejected and disable debouncing."""
+        for debounce_ms, expected in [(True, 0), (-1, 0), ('100', 0), (None, 0), (0, 0), (100, 100), (2.5, 2.5)]:
+            with self.subTest(debounce_ms=debounce_ms):
+                output = io.StringIO()
+                with contextlib.redirect_stdout(output):
+                    command = Command(name='test', command='true', event='note_on', debounce_ms=debounce_ms)
+                self.assertEqual(command.debounce_ms, expected)
+                self.assertEqual("Error parsing the debounce_ms field" in output.getvalue(), debounce_ms != expected)
+
+
+class TestCoalesceMessages(TestCase):
+    """Test the coalescing of control change messages."""
+
+    def test_coalesce_messages(self):
+        """Only the latest control change message per port, channel, and control
+        is kept at its latest position; other messages are kept in order."""
+        port_a = types.SimpleNamespace(name='A')
+        port_b = types.SimpleNamespace(name='B')
+        cc = lambda value, control=1, channel=0: mido.Message('control_change', channel=channel, control=control, value=value)
+        first = (port_a, cc(1))
+        pending = [(port_a, mido.Message('note_on', note=60)),
+                   (port_a, cc(2)),
+                   (port_b, cc(3)),
+                   (port_a, cc(4, channel=1)),
+                   (port_a, cc(5, control=2)),
+                   (port_a, cc(6)),
+                   (port_a, mido.Message('note_off', note=60))]
+
+        # The launcher is created without calling __init__() so that no MIDI
+        # ports are opened.
+        launcher = MIDILauncher.__new__(MIDILauncher)
+        launcher.queue = queue.SimpleQueue()
+        for item in pending:
+            launcher.queue.put(item)
+
+        expected = [pending[0], pending[2], pending[3], pending[4], pending[5], pending[6]]
+        self.assertEqual(launcher.coalesce_messages(*first), expected)
+        self.assertTrue(launcher.queue.empty())
+
+
+class TestLaunch(TestCase):
+    """Test how commands are launched (directly or via the shell)."""
+
+    @unittest.skipIf(os.name == 'nt', "The shell is always used on Windows.")
+    def test_command_argv(self):
+        """Simple commands are split into arguments; all others use the shell."""
+
+        # Each case consists of the command string and the expected arguments
+        # for the value 64 (None: the command is launched via the shell).
+        cases = [
+            ("echo $VALUE", ['echo', '64']),
+            ("echo 'Note on received: $VALUE'", ['echo', 'Note on received: 64']),
+            ("notify-send \"$PERCENTAGE%\" $DECIMAL", ['notify-send', '50%', '64.0']),
+            ("true", ['true']),
+            ("echo a | cat", None),
+            ("VAR=1 env", None),
+            ("echo 'unbalanced", None),
+            ("ls ~", None),
+            ("echo $HOME", None),
+            ("echo a > file", None),
+            ("", None),
+        ]
+        for command_string, expected in cases:
+            with self.subTest(command=command_string):
+                command = Command(name='test', command=command_string, event='control_change')
+                argv = None if command._command_argv is None else command._command_argv[64]
+                self.assertEqual(argv, expected)
+                self.assertEqual(command._command_str[64], command.substitute_placeholders(64))
+
+    @unittest.skipIf(os.name == 'nt', "The shell is always used on Windows.")
+    def test_shell_fallback(self):
+        """If the command cannot be started directly, the shell is used."""
+        def spawn(command, args, shell):
+            if not shell:
+                raise FileNotFoundError(args[0])
+
+        command = Command(name='test', command='builtin $VALUE', event='control_change')
+        with mock.patch.object(Command, '_spawn', autospec=True, side_effect=spawn) as spawn_mock:
+            command.launch(5)
+        self.assertEqual([call.args[1:] + (call.kwargs['shell'],) for call in spawn_mock.call_args_list],
+                         [(['builtin', '5'], False), ('builtin 5', True)])
+
+
+class ConfigFileTestCase(TestCase):
+    """Base class for tests which parse the configuration file given by the
+    config attribute. The cache is stored in a temporary directory."""
+
+    config = ""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.config_file = os.path.join(directory.name, 'config.toml')
+        with open(self.config_file, 'w', encoding='utf-8') as file:
+            file.write(self.config)
+        patcher = mock.patch.dict(os.environ, {'XDG_CACHE_HOME': os.path.join(directory.name, 'cache')})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def parse(self, verbosity_level=0):
+        """Parse the configuration file and return the launcher and its output."""
+        # The launcher is created without calling __init__() so that no MIDI
+        # ports are opened.
+        launcher = MIDILauncher.__new__(MIDILauncher)
+        launcher.config_file = self.config_file
+        launcher.verbosity_level = verbosity_level
+        launcher.commands = []
+        launcher._message_types = None
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            launcher.parse_config_file()
+        return launcher, output.getvalue()
+
+
+class TestDispatch(ConfigFileTestCase):
+    """Test which commands are launched for the received messages."""
+
+    config = """
+version = 1
+
+[[commands]]
+name = "note 60"
+event = "note_on"
+note = 60
+command = "true"
+
+[[commands]]
+name = "any note"
+event = "note_on"
+command = "true"
+
+[[commands]]
+name = "loud notes"
+event = "note_on"
+velocities = "100-127"
+command = "true"
+
+[[commands]]
+name = "note off"
+event = "note_off"
+note = [60, 61]
+command = "true"
+
+[[commands]]
+name = "inactive"
+active = false
+event = "note_on"
+note = 60
+command = "true"
+
+[[commands]]
+name = "volume"
+event = "control_change"
+control = 7
+command = "true"
+
+[[commands]]
+name = "volume LPD8 channel 2"
+event = "control_change"
+control = 7
+channels = 2
+ports = "LPD8"
+command = "true"
+"""
+
+    def dispatch(self, verbosity_level):
+        """Dispatch a sequence of messages and return the launched (command
+        name, value) pairs."""
+        launcher, _ = self.parse(verbosity_level)
+        lpd8 = types.SimpleNamespace(_display_name='LPD8', _name_lower='lpd8:lpd8 midi 1 20:0')
+        keylab = types.SimpleNamespace(_display_name='Arturia KeyLab', _name_lower='arturia keylab:0')
+        messages = [(lpd8, mido.Message('note_on', note=60, velocity=100)),
+                    (keylab, mido.Message('note_on', note=61, velocity=10)),
+                    (lpd8, mido.Message('note_off', note=60, velocity=0)),
+                    (lpd8, mido.Message('note_off', note=62, velocity=0)),
+                    (lpd8, mido.Message('control_change', channel=0, control=7, value=1)),
+                    (lpd8, mido.Message('control_change', channel=1, control=7, value=2)),
+                    (keylab, mido.Message('control_change', channel=1, control=7, value=3)),
+                    (lpd8, mido.Message('control_change', channel=1, control=8, value=4)),
+                    (lpd8, mido.Message('program_change', program=1)),
+                    (lpd8, mido.Message('clock'))]
+
+        launched = []
+        def launch(command, value, verbosity_level=0):
+            launched.append((command.name, value))
+
+        with mock.patch.object(Command, 'launch', autospec=True, side_effect=launch), \
+             contextlib.redirect_stdout(io.StringIO()):
+            for port, message in messages:
+                launcher.dispatch(port, message)
+        return launched
+
+    def test_dispatch(self):
+        """The index used at low verbosity launches the same commands as
+        passing every message to all commands (used for debug output)."""
+        expected = [('note 60', 100), ('any note', 100), ('loud notes', 100),
+                    ('any note', 10),
+                    ('note off', 0),
+                    ('volume', 1),
+                    ('volume', 2), ('volume LPD8 channel 2', 2),
+                    ('volume', 3)]
+        for verbosity_level in (0, 1, 2):
+            with self.subTest(verbosity_level=verbosity_level):
+                self.assertEqual(self.dispatch(verbosity_level), expected)
+
+
+class TestMessageFilter(ConfigFileTestCase):
+    """Test which received messages are put into the message queue."""
+
+    config = TestDispatch.config
+
+    messages = [mido.Message('note_on', note=60), mido.Message('note_off', note=60),
+                mido.Message('control_change', control=7), mido.Message('program_change'),
+                mido.Message('pitchwheel'), mido.Message('clock'), mido.Message('sysex')]
+
+    def received(self, launcher):
+        """Pass the messages to the port callback and return the queued types."""
+        launcher.queue = queue.Queue()
+        for message in self.messages:
+            launcher._on_message(None, message)
+        queued = []
+        while not launcher.queue.empty():
+            queued.append(launcher.queue.get_nowait()[1].type)
+        return queued
+
+    def test_filter(self):
+        """Only the message types used by active commands are queued."""
+        for verbosity_level in (0, 1):
+            with self.subTest(verbosity_level=verbosity_level):
+                launcher, _ = self.parse(verbosity_level)
+                self.assertEqual(self.received(launcher), ['note_on', 'note_off', 'control_change'])
+
+    def test_debug_output(self):
+        """All messages are queued for the debug output."""
+        launcher, _ = self.parse(verbosity_level=2)
+        self.assertEqual(self.received(launcher), [message.type for message in self.messages])
+
+    def test_before_parsing(self):
+        """All messages are queued before the configuration file is parsed."""
+        launcher = MIDILauncher.__new__(MIDILauncher)
+        launcher._message_types = None
+        self.assertEqual(self.received(launcher), [message.type for message in self.messages])
+
+
+class TestCommandCache(ConfigFileTestCase):
+    """Test the cache of the parsed configuration file."""
+
+    config = """
+version = 1
+
+[[commands]]
+name = "invalid"
+event = "note-on"
+command = "echo invalid"
+
+[[commands]]
+name = "valid"
+event = "note_on"
+note = 60
+command = "echo valid"
+"""
+
+    def test_messages_are_replayed(self):
+        """Errors in the configuration file are printed on a cache hit as well."""
+        launcher, output = self.parse()
+        self.assertIn("Invalid event type", output)
+        self.assertTrue(os.path.exists(launcher._command_cache_file()))
+
+        with mock.patch.object(MIDILauncher, 'read_config_file', side_effect=AssertionError):
+            launcher, cached_output = self.parse()
+        self.assertEqual(cached_output, output)
+        self.assertEqual([command.active for command in launcher.commands], [False, True])
+
+    def test_cache_hit(self):
+        """An unchanged configuration file is loaded from the cache."""
+        self.parse()
+        with mock.patch.object(MIDILauncher, 'read_config_file', side_effect=AssertionError):
+            launcher, _ = self.parse()
+        self.assertEqual([command.name for command in launcher.commands], ['invalid', 'valid'])
+
+    def test_cache_miss(self):
+        """The cache is not used if the configuration file or the code changed."""
+        launcher, _ = self.parse()
+        stat = os.stat(self.config_file)
+
+        # Changed modification time
+        os.utime(self.config_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        with mock.patch.object(MIDILauncher, 'read_config_file', autospec=True) as read_config_file:
+            self.parse()
+        read_config_file.assert_called_once()
+
+        # Changed size (with the original modification time)
+        with open(self.config_file, 'a', encoding='utf-8') as file:
+            file.write("\n")
+        os.utime(self.config_file, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        with mock.patch.object(MIDILauncher, 'read_config_file', autospec=True) as read_config_file:
+            self.parse()
+        read_config_file.assert_called_once()
+
+        # Changed code
+        self.parse()
+        with mock.patch('midi_launcher._code_hash', return_value='changed'), \
+             mock.patch.object(MIDILauncher, 'read_config_file', autospec=True) as read_config_file:
+            self.parse()
+        read_config_file.assert_called_once()
+
+    def test_corrupt_cache(self):
+        """A corrupt cache file is ignored and replaced."""
+        launcher, output = self.parse()
+        with open(launcher._command_cache_file(), 'wb') as file:
+            file.write(b'corrupt')
+        launcher, corrupt_output = self.parse()
+        self.assertEqual(corrupt_output, output)
+        self.assertEqual([command.name for command in launcher.commands], ['invalid', 'valid'])
+        with mock.patch.object(MIDILauncher, 'read_config_file', side_effect=AssertionError):
+            self.parse()
 
 
 if __name__ == '__main__':